@@ -1,50 +1,98 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, Boolean, func
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Boolean, Index, event, func, insert, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
-from typing import Optional
-import random
-from contextlib import contextmanager
+from typing import List, Optional
+import asyncio
+import logging
+import math
+import os
+import numpy as np
+import orjson
+from cachetools import TTLCache
+try:
+    from numba import njit
+except ImportError:  # numba is optional; batch pricing falls back to NumPy
+    njit = None
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Dynamic Pricing Engine", version="2.1")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    await start_pricing_log()
+    yield
+    await stop_pricing_log()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app = FastAPI(title="Dynamic Pricing Engine", version="2.1", lifespan=lifespan)
+
+# Comma-separated frontend origins; set CORS_ORIGINS="" when the reverse proxy handles CORS
+CORS_ORIGINS = [o.strip() for o in os.environ.get(
+    "CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000"
+).split(",") if o.strip()]
+
+if CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=False,
+        allow_methods=["GET", "POST"],
+        allow_headers=["Content-Type"],
+    )
 
 # Database setup
-engine = create_engine("sqlite:///pricing.db")
-SessionLocal = sessionmaker(bind=engine)
+engine = create_async_engine(
+    "sqlite+aiosqlite:///pricing.db",
+    pool_size=10,
+    max_overflow=20,
+    pool_recycle=3600,
+)
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 Base = declarative_base()
 
-@contextmanager
-def get_db():
-    db = SessionLocal()
-    try:
+@asynccontextmanager
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets analytics reads proceed while pricing writes commit.
+    # Note: page_size can only be changed with WAL disabled.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
+
+# SQLite INTEGER is a signed 64-bit value; larger ints cannot be logged
+_SQLITE_INT_MIN = -2**63
+_SQLITE_INT_MAX = 2**63 - 1
 
 class PricingRequest(BaseModel):
     product_id: str
     cost_price: float
-    demand_score: int
-    inventory: int
-    competitor_price: float
+    demand_score: int = Field(ge=_SQLITE_INT_MIN, le=_SQLITE_INT_MAX)
+    inventory: int = Field(ge=_SQLITE_INT_MIN, le=_SQLITE_INT_MAX)
+    # Pricing divides by competitor_price; reject 0 so every pricing path agrees
+    competitor_price: float = Field(gt=0)
     customer_segment: Optional[str] = "standard"
     seasonality_factor: Optional[float] = 1.0
 
 class PricingHistory(Base):
     __tablename__ = "pricing_history"
+    __table_args__ = (
+        Index("idx_ph_pid_ts", "product_id", "timestamp"),
+        Index("idx_ph_ts", "timestamp"),
+    )
     id = Column(Integer, primary_key=True)
-    product_id = Column(String, index=True)
+    product_id = Column(String)
     timestamp = Column(DateTime, default=datetime.utcnow)
     original_price = Column(Float)
     dynamic_price = Column(Float)
@@ -57,14 +105,192 @@ class PricingHistory(Base):
 
 class CompetitorPrice(Base):
     __tablename__ = "competitor_prices"
+    __table_args__ = (
+        Index("idx_cp_pid_ts", "product_id", "timestamp"),
+        Index("idx_cp_ts", "timestamp"),
+    )
     id = Column(Integer, primary_key=True)
-    product_id = Column(String, index=True)
+    product_id = Column(String)
     competitor_name = Column(String)
     price = Column(Float)
     timestamp = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
 
-Base.metadata.create_all(bind=engine)
+class PricingHistoryDaily(Base):
+    __tablename__ = "pricing_history_daily"
+    product_id = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
+    avg_price = Column(Float)
+    sales = Column(Integer, default=0)
+
+# Core statements for the write-behind flush, built once so every batch
+# hits SQLAlchemy's compiled cache and skips the ORM unit of work
+_INSERT_HISTORY = insert(PricingHistory.__table__)
+
+# Fold priced sales into the running daily average (SQLite UPSERT)
+_rollup_insert = sqlite_insert(PricingHistoryDaily.__table__)
+_DAILY_ROLLUP = _rollup_insert.on_conflict_do_update(
+    index_elements=["product_id", "date"],
+    set_={
+        "avg_price": (PricingHistoryDaily.avg_price * PricingHistoryDaily.sales
+                      + _rollup_insert.excluded.avg_price * _rollup_insert.excluded.sales)
+                     / (PricingHistoryDaily.sales + _rollup_insert.excluded.sales),
+        "sales": PricingHistoryDaily.sales + _rollup_insert.excluded.sales
+    }
+)
+
+def _create_indexes(sync_conn):
+    # create_all skips indexes on tables that already exist
+    for table in (PricingHistory.__table__, CompetitorPrice.__table__):
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_indexes)
+        # The composite indexes lead with product_id, so the old single-column ones are redundant
+        await conn.execute(text("DROP INDEX IF EXISTS ix_pricing_history_product_id"))
+        await conn.execute(text("DROP INDEX IF EXISTS ix_competitor_prices_product_id"))
+        # Backfill days recorded before the rollup table existed
+        await conn.execute(text(
+            "INSERT OR IGNORE INTO pricing_history_daily (product_id, date, avg_price, sales) "
+            "SELECT product_id, date(timestamp), avg(dynamic_price), count(id) "
+            "FROM pricing_history GROUP BY product_id, date(timestamp)"
+        ))
+        # Refresh planner statistics so SQLite picks the composite indexes
+        await conn.execute(text("ANALYZE"))
+
+# Write-behind log: pricing calls enqueue history rows and return immediately;
+# a background task commits them in batches. The queue is bounded so callers
+# wait once the writer falls behind. A batch that fails on a locked or
+# unavailable database is retried; any other failure is retried row by row and
+# rows that still fail are logged and dropped. Rows still queued when the
+# process dies without a clean shutdown are lost.
+_FLUSH_INTERVAL = 0.05
+_FLUSH_BATCH_SIZE = 1000
+_PRICING_LOG_MAXSIZE = 50 * _FLUSH_BATCH_SIZE
+_ENQUEUE_TIMEOUT = 5.0
+_pricing_log_queue: Optional[asyncio.Queue] = None
+_pricing_log_stop: Optional[asyncio.Event] = None
+_pricing_log_task: Optional[asyncio.Task] = None
+_pricing_log_pending: List[dict] = []
+logger = logging.getLogger(__name__)
+
+async def _write_pricing_log(rows):
+    rollup = [
+        {"product_id": row["product_id"], "date": row["timestamp"].date(), "avg_price": row["dynamic_price"], "sales": 1}
+        for row in rows
+    ]
+    async with get_db() as db:
+        await db.execute(_INSERT_HISTORY, rows)
+        await db.execute(_DAILY_ROLLUP, rollup)
+        await db.commit()
+
+async def _flush_pricing_log():
+    # Rows stay in _pricing_log_pending until they are committed or dropped
+    rows = _pricing_log_pending
+    while len(rows) < _FLUSH_BATCH_SIZE and not _pricing_log_queue.empty():
+        rows.append(_pricing_log_queue.get_nowait())
+    if not rows:
+        return
+    
+    try:
+        await _write_pricing_log(rows)
+    except OperationalError:
+        # Locked or unavailable database: keep the batch for the next tick
+        raise
+    except Exception:
+        logger.exception("Failed to flush pricing history batch; retrying row by row")
+        while rows:
+            try:
+                await _write_pricing_log(rows[:1])
+            except OperationalError:
+                raise
+            except Exception:
+                logger.exception("Dropping unwritable pricing history row: %r", rows[0])
+            del rows[0]
+        return
+    rows.clear()
+
+async def _pricing_log_writer():
+    while not _pricing_log_stop.is_set():
+        await asyncio.sleep(_FLUSH_INTERVAL)
+        try:
+            await _flush_pricing_log()
+            # Keep draining full batches instead of waiting for the next tick
+            while _pricing_log_queue.qsize() >= _FLUSH_BATCH_SIZE:
+                await _flush_pricing_log()
+        except Exception:
+            logger.exception("Failed to flush pricing history; retrying next tick")
+
+async def _enqueue_pricing_log(rows):
+    async def put_all():
+        for row in rows:
+            await _pricing_log_queue.put(row)
+    
+    try:
+        await asyncio.wait_for(put_all(), _ENQUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Pricing history writer is backlogged; retry later")
+
+async def start_pricing_log():
+    global _pricing_log_queue, _pricing_log_stop, _pricing_log_task
+    _pricing_log_queue = asyncio.Queue(maxsize=_PRICING_LOG_MAXSIZE)
+    _pricing_log_stop = asyncio.Event()
+    _pricing_log_task = asyncio.create_task(_pricing_log_writer())
+
+async def stop_pricing_log():
+    _pricing_log_stop.set()
+    await _pricing_log_task
+    try:
+        while _pricing_log_pending or not _pricing_log_queue.empty():
+            await _flush_pricing_log()
+    except Exception:
+        logger.exception("Dropping unflushed pricing history at shutdown")
+
+# Pricing lookup tables, indexed directly by demand score (0-10; slot 0 is the fallback markup)
+_MARKUPS = (0.30, 0.15, 0.18, 0.20, 0.25, 0.30, 0.35, 0.42, 0.50, 0.60, 0.75)
+_DEMAND_DEFAULT = (0.85,) * 4 + (1.0,) * 4 + (1.25,) * 3
+_DEMAND_AGGRESSIVE = (0.9,) * 4 + (1.1,) * 4 + (1.4,) * 3
+_DEMAND_CONSERVATIVE = (0.8,) * 4 + (0.95,) * 4 + (1.15,) * 3
+_INVENTORY_THRESHOLDS = (10, 100)
+_INVENTORY_FACTORS = (1.15, 1.0, 0.90)
+# ndarray copies of the tables for the batch paths
+_MARKUPS_ARR = np.array(_MARKUPS)
+_DEMAND_DEFAULT_ARR = np.array(_DEMAND_DEFAULT)
+_INVENTORY_THRESHOLDS_ARR = np.array(_INVENTORY_THRESHOLDS)
+_INVENTORY_FACTORS_ARR = np.array(_INVENTORY_FACTORS)
+_SEGMENT_FACTORS = {
+    "premium": 1.2, "standard": 1.0,
+    "budget": 0.85, "loyalty": 0.90
+}
+
+def _cents(x: float) -> float:
+    # Round half up to the cent; cheaper than round(x, 2)
+    return math.floor(x*100 + 0.5) / 100
+
+def _cents_array(x: np.ndarray) -> np.ndarray:
+    # Vectorized _cents for batch pricing
+    return np.floor(x*100 + 0.5) / 100
+
+if njit is not None:
+    # Compiled eagerly from the signature so no request pays the JIT cost
+    @njit("void(float64[:], int64[:], int64[:], float64[:], float64[:], float64[:], float64[:], float64[:])", cache=True)
+    def _batch_default(cost, ds, inv, comp, season, seg_factor, price_out, base_out):
+        # Compiled _calculate_default_price over a batch of requests
+        for i in range(cost.shape[0]):
+            d = ds[i]
+            base = cost[i] * (1 + _MARKUPS_ARR[d if 1 <= d <= 10 else 0])
+            demand_factor = _DEMAND_DEFAULT_ARR[min(max(d, 0), 10)]
+            inv_factor = _INVENTORY_FACTORS_ARR[np.searchsorted(_INVENTORY_THRESHOLDS_ARR, inv[i])]
+            comp_ratio = base / comp[i]
+            comp_factor = 0.95 if comp_ratio > 1.1 else 1.05 if comp_ratio < 0.9 else 1.0
+            price = base * demand_factor * inv_factor * comp_factor * season[i] * seg_factor[i]
+            price_out[i] = max(cost[i]*1.1, min(price, comp[i]*1.2))
+            base_out[i] = base
+else:
+    _batch_default = None
 
 class DynamicPricingEngine:
     def __init__(self):
@@ -75,11 +301,10 @@ class DynamicPricingEngine:
         }
 
     def _get_base_markup(self, ds: int) -> float:
-        markups = {
-            1: 0.15, 2: 0.18, 3: 0.20, 4: 0.25, 5: 0.30,
-            6: 0.35, 7: 0.42, 8: 0.50, 9: 0.60, 10: 0.75
-        }
-        return markups.get(ds, 0.30)
+        return _MARKUPS[ds if 1 <= ds <= 10 else 0]
+
+    def _demand_factor(self, ds: int, table) -> float:
+        return table[0 if ds < 0 else 10 if ds > 10 else ds]
 
     def _factor(self, value, thresholds, factors):
         for th, f in zip(thresholds, factors):
@@ -91,64 +316,114 @@ class DynamicPricingEngine:
         calculation_method = self.price_adjustment_strategies.get(strategy, self._calculate_default_price)
         price_data = calculation_method(req)
         
-        with get_db() as db:
-            db.add(PricingHistory(
-                product_id=req.product_id,
-                original_price=price_data["base_price"],
-                dynamic_price=price_data["dynamic_price"],
-                demand_score=req.demand_score,
-                inventory=req.inventory,
-                competitor_price=req.competitor_price,
-                strategy_used=strategy
-            ))
-            db.commit()
+        await _enqueue_pricing_log([{
+            "product_id": req.product_id,
+            "timestamp": datetime.utcnow(),
+            "original_price": price_data["base_price"],
+            "dynamic_price": price_data["dynamic_price"],
+            "demand_score": req.demand_score,
+            "inventory": req.inventory,
+            "competitor_price": req.competitor_price,
+            "strategy_used": strategy
+        }])
+        
+        return price_data
+
+    async def calculate_batch(self, reqs: List[PricingRequest]):
+        price_data = self._calculate_default_prices(reqs)
+        
+        now = datetime.utcnow()
+        history = [
+            {
+                "product_id": req.product_id,
+                "timestamp": now,
+                "original_price": data["base_price"],
+                "dynamic_price": data["dynamic_price"],
+                "demand_score": req.demand_score,
+                "inventory": req.inventory,
+                "competitor_price": req.competitor_price,
+                "strategy_used": "default"
+            }
+            for req, data in zip(reqs, price_data)
+        ]
+        await _enqueue_pricing_log(history)
         
         return price_data
 
     def _calculate_default_price(self, req: PricingRequest):
         base = req.cost_price * (1 + self._get_base_markup(req.demand_score))
-        demand_factor = self._factor(req.demand_score, [3,7], [0.85,1.0,1.25])
-        inv_factor = self._factor(req.inventory, [10,100], [1.15,1.0,0.90])
+        demand_factor = self._demand_factor(req.demand_score, _DEMAND_DEFAULT)
+        inv_factor = self._factor(req.inventory, _INVENTORY_THRESHOLDS, _INVENTORY_FACTORS)
         comp_ratio = base / req.competitor_price
         comp_factor = 0.95 if comp_ratio > 1.1 else 1.05 if comp_ratio < 0.9 else 1.0
-        seg_factor = {
-            "premium": 1.2, "standard": 1.0,
-            "budget": 0.85, "loyalty": 0.90
-        }.get(req.customer_segment, 1.0)
+        seg_factor = _SEGMENT_FACTORS.get(req.customer_segment, 1.0)
         
         price = base * demand_factor * inv_factor * comp_factor * req.seasonality_factor * seg_factor
         price = max(req.cost_price*1.1, min(price, req.competitor_price*1.2))
         
         return {
             "product_id": req.product_id,
-            "dynamic_price": round(price, 2),
-            "base_price": round(base, 2),
+            "dynamic_price": _cents(price),
+            "base_price": _cents(base),
             "strategy": "default"
         }
 
+    def _calculate_default_prices(self, reqs: List[PricingRequest]):
+        # Vectorized _calculate_default_price over a batch of requests
+        cost = np.array([r.cost_price for r in reqs], dtype=np.float64)
+        ds = np.array([r.demand_score for r in reqs], dtype=np.int64)
+        inv = np.array([r.inventory for r in reqs], dtype=np.int64)
+        comp = np.array([r.competitor_price for r in reqs], dtype=np.float64)
+        season = np.array([r.seasonality_factor for r in reqs], dtype=np.float64)
+        seg_factor = np.array([_SEGMENT_FACTORS.get(r.customer_segment, 1.0) for r in reqs])
+        
+        if _batch_default is not None:
+            price = np.empty_like(cost)
+            base = np.empty_like(cost)
+            _batch_default(cost, ds, inv, comp, season, seg_factor, price, base)
+        else:
+            base = cost * (1 + _MARKUPS_ARR[np.where((ds >= 1) & (ds <= 10), ds, 0)])
+            demand_factor = _DEMAND_DEFAULT_ARR[np.clip(ds, 0, 10)]
+            inv_factor = _INVENTORY_FACTORS_ARR[np.searchsorted(_INVENTORY_THRESHOLDS_ARR, inv)]
+            comp_ratio = base / comp
+            comp_factor = np.where(comp_ratio > 1.1, 0.95, np.where(comp_ratio < 0.9, 1.05, 1.0))
+            
+            price = base * demand_factor * inv_factor * comp_factor * season * seg_factor
+            price = np.maximum(cost*1.1, np.minimum(price, comp*1.2))
+        
+        return [
+            {
+                "product_id": req.product_id,
+                "dynamic_price": p,
+                "base_price": b,
+                "strategy": "default"
+            }
+            for req, p, b in zip(reqs, _cents_array(price).tolist(), _cents_array(base).tolist())
+        ]
+
     def _calculate_aggressive_price(self, req: PricingRequest):
         base = req.cost_price * (1 + self._get_base_markup(req.demand_score) + 0.1)
-        demand_factor = self._factor(req.demand_score, [3,7], [0.9,1.1,1.4])
+        demand_factor = self._demand_factor(req.demand_score, _DEMAND_AGGRESSIVE)
         price = base * demand_factor
         price = max(req.cost_price*1.05, min(price, req.competitor_price*1.1))
         
         return {
             "product_id": req.product_id,
-            "dynamic_price": round(price, 2),
-            "base_price": round(base, 2),
+            "dynamic_price": _cents(price),
+            "base_price": _cents(base),
             "strategy": "aggressive"
         }
 
     def _calculate_conservative_price(self, req: PricingRequest):
         base = req.cost_price * (1 + self._get_base_markup(req.demand_score) - 0.05)
-        demand_factor = self._factor(req.demand_score, [3,7], [0.8,0.95,1.15])
+        demand_factor = self._demand_factor(req.demand_score, _DEMAND_CONSERVATIVE)
         price = base * demand_factor
         price = max(req.cost_price*1.15, min(price, req.competitor_price*0.95))
         
         return {
             "product_id": req.product_id,
-            "dynamic_price": round(price, 2),
-            "base_price": round(base, 2),
+            "dynamic_price": _cents(price),
+            "base_price": _cents(base),
             "strategy": "conservative"
         }
 
@@ -158,80 +433,127 @@ pricing_engine = DynamicPricingEngine()
 async def calculate_price(request: PricingRequest):
     return await pricing_engine.calculate(request)
 
+# Batches are priced synchronously on the event loop, so bound their size
+_MAX_BATCH_SIZE = 1000
+
+@app.post("/calculate-price/batch")
+async def calculate_price_batch(requests: List[PricingRequest]):
+    if len(requests) > _MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {_MAX_BATCH_SIZE} requests")
+    if not requests:
+        return []
+    return await pricing_engine.calculate_batch(requests)
+
+async def _fetch_all(stmt):
+    # Each statement gets its own session, i.e. its own pooled connection,
+    # so independent analytics reads can run concurrently under WAL
+    async with get_db() as db:
+        return (await db.execute(stmt)).all()
+
+async def _pricing_performance(product_id: Optional[str], days: int):
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    history_filter = [PricingHistory.timestamp >= cutoff]
+    daily_filter = [PricingHistoryDaily.date >= cutoff.date()]
+    if product_id:
+        history_filter.append(PricingHistory.product_id == product_id)
+        daily_filter.append(PricingHistoryDaily.product_id == product_id)
+    
+    competitor_avg = select(
+        func.avg(CompetitorPrice.price)
+    ).where(
+        CompetitorPrice.timestamp >= cutoff
+    ).scalar_subquery()
+    
+    metrics_query = select(
+        func.avg(PricingHistory.dynamic_price),
+        func.count(PricingHistory.id),
+        func.avg(PricingHistory.conversion_rate),
+        func.sum(PricingHistory.revenue_generated),
+        competitor_avg
+    ).where(*history_filter)
+    
+    trend_query = select(
+        PricingHistoryDaily.date,
+        func.sum(PricingHistoryDaily.avg_price * PricingHistoryDaily.sales) / func.sum(PricingHistoryDaily.sales),
+        func.sum(PricingHistoryDaily.sales)
+    ).where(*daily_filter).group_by(PricingHistoryDaily.date).order_by(PricingHistoryDaily.date)
+    
+    (metrics,), price_trend = await asyncio.gather(_fetch_all(metrics_query), _fetch_all(trend_query))
+    return metrics, price_trend
+
+# Dashboards poll analytics every few seconds; serve repeats from memory
+_analytics_cache = TTLCache(maxsize=1024, ttl=10)
+
 @app.get("/analytics/pricing-performance")
 async def analytics(product_id: Optional[str] = None, days: int = 7):
-    with get_db() as db:
-        query = db.query(
-            func.avg(PricingHistory.dynamic_price).label("average_price"),
-            func.count(PricingHistory.id).label("price_changes"),
-            func.avg(PricingHistory.conversion_rate).label("conversion_rate"),
-            func.sum(PricingHistory.revenue_generated).label("revenue_impact")
-        )
-        
-        if product_id:
-            query = query.filter(PricingHistory.product_id == product_id)
-        
-        metrics = query.filter(
-            PricingHistory.timestamp >= datetime.utcnow() - timedelta(days=days)
-        ).first()
-        
-        comp_avg = db.query(
-            func.avg(CompetitorPrice.price).label("competitor_avg")
-        ).filter(
-            CompetitorPrice.timestamp >= datetime.utcnow() - timedelta(days=days)
-        ).first()
-        
-        trend_query = db.query(
-            func.date(PricingHistory.timestamp).label("date"),
-            func.avg(PricingHistory.dynamic_price).label("price"),
-            func.count(PricingHistory.id).label("sales")
-        ).group_by("date").order_by("date")
-        
-        if product_id:
-            trend_query = trend_query.filter(PricingHistory.product_id == product_id)
-            
-        price_trend = trend_query.filter(
-            PricingHistory.timestamp >= datetime.utcnow() - timedelta(days=days)
-        ).all()
+    key = (product_id, days)
+    body = _analytics_cache.get(key)
+    if body is not None:
+        return Response(body, media_type="application/json")
     
-    return {
+    metrics, price_trend = await _pricing_performance(product_id, days)
+    
+    average_price, price_changes, conversion_rate, revenue_impact, competitor_avg = metrics
+    # Serialize once with orjson and cache the bytes; hits skip encoding entirely
+    _analytics_cache[key] = body = orjson.dumps({
         "metrics": {
-            "average_price": float(metrics.average_price) if metrics.average_price else 0,
-            "price_changes": metrics.price_changes or 0,
-            "conversion_rate": metrics.conversion_rate or 0,
-            "revenue_impact": metrics.revenue_impact or 0,
-            "competitor_price_avg": float(comp_avg.competitor_avg) if comp_avg.competitor_avg else 0
+            "average_price": float(average_price) if average_price else 0,
+            "price_changes": price_changes or 0,
+            "conversion_rate": conversion_rate or 0,
+            "revenue_impact": revenue_impact or 0,
+            "competitor_price_avg": float(competitor_avg) if competitor_avg else 0
         },
         "price_trend": [
-            {"date": str(t.date), "price": float(t.price), "sales": t.sales}
-            for t in price_trend
+            {"date": day, "price": float(price), "sales": sales}
+            for day, price, sales in price_trend
         ]
-    }
+    })
+    return Response(body, media_type="application/json")
+
+_rng = np.random.default_rng()
 
 @app.post("/competitor-prices/update")
 async def update_competitors(tasks: BackgroundTasks):
     async def monitor_competitors():
         competitors = ["Amazon", "Walmart", "Target", "BestBuy", "eBay"]
-        with get_db() as db:
-            for competitor in competitors:
-                mock_price = round(random.uniform(40, 60), 2)
-                db.add(CompetitorPrice(
-                    product_id="PROD-001",
-                    competitor_name=competitor,
-                    price=mock_price
-                ))
-            db.commit()
+        prices = _rng.uniform(40, 60, len(competitors)).round(2).tolist()
+        rows = [
+            {
+                "product_id": "PROD-001",
+                "competitor_name": competitor,
+                "price": price
+            }
+            for competitor, price in zip(competitors, prices)
+        ]
+        async with get_db() as db:
+            await db.execute(insert(CompetitorPrice), rows)
+            await db.commit()
     
     tasks.add_task(monitor_competitors)
     return {"message": "Competitor price monitoring initiated"}
 
+# Liveness probes can hit /health many times a second; check SQLite at most once a second
+_health_cache = TTLCache(maxsize=1, ttl=1)
+
+async def _database_status() -> str:
+    status = _health_cache.get("database")
+    if status is None:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            status = "connected"
+        except Exception:
+            status = "disconnected"
+        _health_cache["database"] = status
+    return status
+
 @app.get("/health")
 async def health():
     return {
         "status": "healthy",
         "version": "2.1",
         "timestamp": datetime.utcnow().isoformat(),
-        "database": "connected" if engine.connect() else "disconnected"
+        "database": await _database_status()
     }
 
 if __name__ == "__main__":